@@ -5,7 +5,23 @@ A high-performance image processing library using Cython and NumPy.
 Provides efficient operations on RGB images represented as 2D NumPy arrays.
 """
 
-from .cython_image_processing import create_sample_image, process_image
+from .cython_image_processing import (
+    create_sample_image,
+    get_filter,
+    image_stats,
+    interleaved_to_planar,
+    planar_to_interleaved,
+    process_image,
+    validate_image,
+)
 
 __version__ = "0.0.1"
-__all__ = ["create_sample_image", "process_image"]
+__all__ = [
+    "create_sample_image",
+    "get_filter",
+    "image_stats",
+    "interleaved_to_planar",
+    "planar_to_interleaved",
+    "process_image",
+    "validate_image",
+]
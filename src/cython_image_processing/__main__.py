@@ -22,7 +22,7 @@ if __name__ == "__main__":
     # Processing operation
     parser.add_argument(
         "--operation",
-        choices=["blur", "sharpen", "edge_detect", "brightness"],
+        choices=["blur", "sharpen", "edge_detect", "brightness", "box_blur"],
         default="blur",
         help="Image processing operation to perform",
     )
@@ -2,15 +2,40 @@
 Main image processing module that interfaces with Cython code.
 """
 
+import functools
+from typing import Callable, Dict, Optional, Tuple
+
 import numpy as np
 
 from . import image_filters
 
+# 1D weights of the 3x3 Gaussian kernel used by the "blur" operation
+_GAUSSIAN_KERNEL = np.array([1.0, 2.0, 1.0]) / 4
+
+# Cython implementation of each supported operation, called as fn(image, out=None)
+_OPS: Dict[str, Callable[..., np.ndarray]] = {
+    "blur": lambda image, out=None: image_filters.gaussian_blur_separable(image, _GAUSSIAN_KERNEL, out=out),
+    "sharpen": image_filters.sharpen_filter,
+    "edge_detect": image_filters.edge_detection,
+    "brightness": lambda image, out=None: image_filters.adjust_brightness(image, 1.2, out=out),
+    "box_blur": lambda image, out=None: image_filters.box_blur(image, 2, out=out),
+}
+
+
+@functools.lru_cache(maxsize=8)
+def _cached_sample_image(width: int, height: int) -> np.ndarray:
+    image = image_filters._create_sample_image(width, height)
+    image.flags.writeable = False
+    return image
+
 
 def create_sample_image(width: int = 512, height: int = 512) -> np.ndarray:
     """
     Create a sample RGB image for testing.
 
+    Sample images are cached per size; each call returns a fresh copy that the
+    caller is free to modify.
+
     Args:
         width: Image width in pixels
         height: Image height in pixels
@@ -18,53 +43,121 @@ def create_sample_image(width: int = 512, height: int = 512) -> np.ndarray:
     Returns:
         A 3D numpy array representing an RGB image with shape (height, width, 3)
     """
-    # Create a gradient pattern for demonstration
-    image = np.zeros((height, width, 3), dtype=np.uint8)
+    return _cached_sample_image(width, height).copy()
 
-    # Red channel: horizontal gradient
-    for x in range(width):
-        image[:, x, 0] = int(255 * x / width)
 
-    # Green channel: vertical gradient
-    for y in range(height):
-        image[y, :, 1] = int(255 * y / height)
+def validate_image(image: np.ndarray) -> None:
+    """
+    Check that an array is a valid input for the image filters.
 
-    # Blue channel: diagonal pattern
-    for y in range(height):
-        for x in range(width):
-            image[y, x, 2] = int(255 * ((x + y) % width) / width)
+    Args:
+        image: Input RGB image as numpy array with shape (height, width, 3)
 
-    return image
+    Raises:
+        ValueError: If the array does not have shape (height, width, 3) and dtype uint8
+    """
+    if image.ndim != 3 or image.shape[2] != 3:  # noqa: PLR2004
+        raise ValueError("Input must be a 3D array with shape (height, width, 3)")
 
+    if not image.dtype == np.uint8:
+        raise ValueError("Input array must have dtype uint8")
 
-def process_image(image: np.ndarray, operation: str = "blur") -> np.ndarray:
+
+def image_stats(image: np.ndarray) -> Tuple[int, int, float]:
     """
-    Process an RGB image using Cython-accelerated operations.
+    Compute the minimum, maximum and mean pixel value of an image.
+
+    All three are computed in a single pass over the data, which is cheaper
+    than separate min(), max() and mean() reductions.
+
+    Args:
+        image: Input uint8 image as numpy array
+
+    Returns:
+        Tuple (min, max, mean)
+    """
+    return image_filters.image_stats(image)
+
+
+def get_filter(operation: str) -> Callable[..., np.ndarray]:
+    """
+    Look up the Cython function implementing an operation.
+
+    The returned function does not validate its input, so callers applying it
+    repeatedly should check the image once with validate_image beforehand.
+
+    Args:
+        operation: Type of processing ("blur", "sharpen", "edge_detect", "brightness", "box_blur")
+
+    Returns:
+        Function taking an RGB image and an optional out= array, and returning
+        the processed image
+    """
+    try:
+        return _OPS[operation]
+    except KeyError:
+        raise ValueError(f"Unknown operation: {operation}") from None
+
+
+def interleaved_to_planar(image: np.ndarray) -> np.ndarray:
+    """
+    Convert an interleaved RGB image to planar (one plane per channel) layout.
 
     Args:
         image: Input RGB image as numpy array with shape (height, width, 3)
-        operation: Type of processing ("blur", "sharpen", "edge_detect", "brightness")
 
     Returns:
-        Processed image as numpy array with same shape as input
+        C-contiguous array with shape (3, height, width); each plane can be
+        passed directly to the single-channel capable filters
     """
-    if image.ndim != 3 or image.shape[2] != 3:  # noqa: PLR2004
-        raise ValueError("Input must be a 3D array with shape (height, width, 3)")
+    if image.dtype == np.uint8 and image.ndim == 3 and image.shape[2] == 3:  # noqa: PLR2004
+        return image_filters.deinterleave_rgb(image)
 
-    if not image.dtype == np.uint8:
-        raise ValueError("Input array must have dtype uint8")
+    return np.ascontiguousarray(image.transpose(2, 0, 1))
+
+
+def planar_to_interleaved(planes: np.ndarray) -> np.ndarray:
+    """
+    Convert planar channel data back to an interleaved RGB image.
+
+    Args:
+        planes: Channel planes with shape (3, height, width), or a sequence of
+            three (height, width) planes
+
+    Returns:
+        Interleaved RGB image with shape (height, width, 3)
+    """
+    if len(planes) == 3 and all(isinstance(p, np.ndarray) and p.dtype == np.uint8 and p.ndim == 2 for p in planes):  # noqa: PLR2004
+        return image_filters.interleave_rgb(*planes)
+
+    return np.stack(planes, axis=-1)
+
+
+def process_image(image: np.ndarray, operation: str = "blur", out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Process an RGB image using Cython-accelerated operations.
+
+    This function is thread-safe: the filters release the GIL while they
+    process pixels, so threads processing different images run concurrently.
+    Concurrent calls must not share an out array.
+
+    Args:
+        image: Input RGB image as numpy array with shape (height, width, 3)
+        operation: Type of processing ("blur", "sharpen", "edge_detect", "brightness", "box_blur")
+        out: Optional C-contiguous uint8 array with the same shape as image to
+            write the result into, so repeated calls can reuse one buffer; it
+            must not overlap image, except that "brightness" also accepts
+            image itself as out and then adjusts it in place
+
+    Returns:
+        Processed image as numpy array with same shape as input (out, if given)
+
+    Raises:
+        ValueError: If the image, operation or output array is invalid
+    """
+    validate_image(image)
 
-    # Call the appropriate Cython function based on operation
-    if operation == "blur":
-        return image_filters.gaussian_blur(image)
-    elif operation == "sharpen":
-        return image_filters.sharpen_filter(image)
-    elif operation == "edge_detect":
-        return image_filters.edge_detection(image)
-    elif operation == "brightness":
-        return image_filters.adjust_brightness(image, 1.2)
-    else:
-        raise ValueError(f"Unknown operation: {operation}")
+    return get_filter(operation)(image, out=out)
 
 
 def demo_processing():
@@ -75,7 +168,8 @@ def demo_processing():
     image = create_sample_image(256, 256)
     print(f"Created image with shape: {image.shape}, dtype: {image.dtype}")
 
-    operations = ["blur", "sharpen", "edge_detect", "brightness"]
+    operations = ["blur", "sharpen", "edge_detect", "brightness", "box_blur"]
+    _, _, original_mean = image_stats(image)
 
     for op in operations:
         print(f"Applying {op} filter...")
@@ -83,8 +177,7 @@ def demo_processing():
         print(f"Processed image shape: {processed.shape}, dtype: {processed.dtype}")
 
         # Calculate some basic stats
-        original_mean = np.mean(image)
-        processed_mean = np.mean(processed)
+        _, _, processed_mean = image_stats(processed)
         print(f"  Original mean intensity: {original_mean:.2f}")
         print(f"  Processed mean intensity: {processed_mean:.2f}")
         print()
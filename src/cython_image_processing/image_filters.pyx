@@ -1,212 +1,809 @@
 # distutils: language = c
-# cython: boundscheck=False, wraparound=False, nonecheck=False
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True, nonecheck=False
 
 """
 High-performance image processing functions implemented in Cython.
 """
 
+import functools
+
 import numpy as np
 cimport numpy as cnp
 cimport cython
-from libc.math cimport exp, sqrt
+from cython.parallel cimport parallel, prange, threadid
+from libc.math cimport exp, sqrtf
+from libc.stdint cimport int16_t, uint8_t
+from libc.string cimport memcpy, memset
+
+
+cdef extern from "simd_conv1d.h":
+    int CONV1D_Q
+    void conv1d_u8(const uint8_t *src, uint8_t *dst, Py_ssize_t n, Py_ssize_t step,
+                   const int16_t *k, int ksize) nogil
+    void conv1d_u8_smooth(const uint8_t *src, uint8_t *dst, Py_ssize_t n, Py_ssize_t step,
+                          const int16_t *k, int ksize) nogil
+    void conv1d_init()
+    int conv1d_set_backend(const char *name)
+    const char *conv1d_backend()
+
+cdef extern from "simd_rgb.h":
+    void rgb_init()
+    void rgb_deinterleave_u8(const uint8_t *src, uint8_t *r, uint8_t *g, uint8_t *b, Py_ssize_t n) nogil
+    void rgb_interleave_u8(const uint8_t *r, const uint8_t *g, const uint8_t *b, uint8_t *dst, Py_ssize_t n) nogil
+
+# Pick the SIMD kernels for this CPU once, at import time
+conv1d_init()
+rgb_init()
+
+cdef extern from *:
+    """
+    #ifdef _OPENMP
+    #include <omp.h>
+    #else
+    static int omp_get_max_threads(void) { return 1; }
+    #endif
+    """
+    # Upper bound on the team size of the next parallel region (1 without OpenMP)
+    int omp_get_max_threads() nogil
 
 # Define numpy array types
 ctypedef cnp.uint8_t DTYPE_t
 
+# Target size of the intermediate buffer of one strip in separable filters,
+# chosen to fit in a typical 32 KB L1 data cache
+cdef int STRIP_BYTES = 32 * 1024
+
+
+def simd_backend():
+    """
+    Return the instruction set used by the 1D convolution kernels.
+
+    Returns:
+        One of "scalar", "sse2", "avx2" or "avx512bw"
+    """
+    return conv1d_backend().decode("ascii")
+
+
+def _set_simd_backend(str name):
+    """
+    Force a specific convolution backend, for testing and benchmarking.
+
+    Args:
+        name: Backend name as returned by simd_backend()
+
+    Raises:
+        ValueError: If the backend is unknown or not supported by this CPU
+    """
+    if conv1d_set_backend(name.encode("ascii")) != 0:
+        raise ValueError(f"SIMD backend not available: {name}")
+
+
+cdef cnp.ndarray _output_array(image, out, bint in_place=False):
+    # Resolve the out= argument of a filter to the array it writes into.
+    # Filters write through flattened views, so out must be C-contiguous;
+    # stencil filters read neighbours of pixels already written, so out must
+    # not share memory with the input unless the filter works in place.
+    if out is None:
+        return np.empty(image.shape, dtype=np.uint8)
+    if not isinstance(out, np.ndarray) or out.dtype != np.uint8:
+        raise ValueError("Output array must have dtype uint8")
+    if out.shape != image.shape:
+        raise ValueError(f"Output array must have shape {image.shape}")
+    if not out.flags.c_contiguous or not out.flags.writeable:
+        raise ValueError("Output array must be C-contiguous and writeable")
+    if not (in_place and out is image) and np.may_share_memory(out, image):
+        raise ValueError("Output array must not overlap the input image")
+    return out
+
+
+cdef cnp.ndarray _with_channel_axis(cnp.ndarray image):
+    # Single-channel (height, width) planes are filtered as (height, width, 1) images
+    if image.ndim == 2:
+        return image[:, :, np.newaxis]
+    return image
+
+
+cdef inline void _fill_span(const DTYPE_t *src, DTYPE_t *dst, Py_ssize_t n, bint clear) noexcept nogil:
+    if clear:
+        memset(dst, 0, n)
+    else:
+        memcpy(dst, src, n)
+
+
+cdef void _fill_border(const DTYPE_t[:, ::1] src, DTYPE_t[:, ::1] dst, int radius, Py_ssize_t step,
+                       bint clear) noexcept nogil:
+    # Copy the pixels closer than radius to the border of a flattened image
+    # (step values per pixel) from src to dst, or zero them in dst if clear
+    cdef Py_ssize_t height = dst.shape[0]
+    cdef Py_ssize_t row_len = dst.shape[1]
+    cdef Py_ssize_t top = min(radius, height)
+    cdef Py_ssize_t bottom = max(height - radius, top)
+    cdef Py_ssize_t left = min(radius * step, row_len)
+    cdef Py_ssize_t right = max(row_len - radius * step, left)
+    cdef Py_ssize_t y
+
+    for y in range(height):
+        if y < top or y >= bottom:
+            _fill_span(&src[y, 0], &dst[y, 0], row_len, clear)
+        else:
+            _fill_span(&src[y, 0], &dst[y, 0], left, clear)
+            _fill_span(&src[y, right], &dst[y, right], row_len - right, clear)
+
+
 @cython.boundscheck(False)
 @cython.wraparound(False)
-def gaussian_blur(cnp.ndarray[DTYPE_t, ndim=3] image):
+@cython.cdivision(True)
+def _create_sample_image(int width, int height):
+    """
+    Fill a new RGB image with the sample gradient and diagonal patterns.
+
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+
+    Returns:
+        Image array with shape (height, width, 3) and dtype uint8
+    """
+    cdef cnp.ndarray[DTYPE_t, ndim=3] image = np.empty((height, width, 3), dtype=np.uint8)
+    if width == 0 or height == 0:
+        return image
+
+    cdef DTYPE_t[:, :, ::1] out = image
+    cdef DTYPE_t[::1] lut = np.empty(width, dtype=np.uint8)
+
+    cdef int y, x, k
+    cdef DTYPE_t green
+
+    with nogil:
+        # Column gradient, shared by the red channel and the diagonal pattern
+        for x in range(width):
+            lut[x] = <DTYPE_t>((255 * x) // width)
+
+        # Every pixel is written in a single pass using table lookups only
+        for y in prange(height, schedule="static"):
+            green = <DTYPE_t>((255 * y) // height)
+            k = y % width
+            for x in range(width):
+                out[y, x, 0] = lut[x]
+                out[y, x, 1] = green
+                out[y, x, 2] = lut[k]
+                # Advance (x + y) % width without a per-pixel modulo (written
+                # out in full, since an in-place add marks a prange reduction)
+                k = k + 1
+                if k == width:
+                    k = 0
+
+    return image
+
+
+cdef void _gaussian_blur_row(const DTYPE_t *up, const DTYPE_t *mid, const DTYPE_t *down, DTYPE_t *out,
+                             Py_ssize_t n, Py_ssize_t step) noexcept nogil:
+    # 3x3 Gaussian kernel (approximation) over one flattened row, as integer
+    # weights over 16:
+    #     1 2 1
+    #     2 4 2
+    #     1 2 1
+    # Neighbouring pixels are step values apart, so the loop runs over every
+    # channel at once with unit stride, which lets the compiler vectorize it.
+    cdef Py_ssize_t i
+
+    for i in range(step, n - step):
+        out[i] = <DTYPE_t>((up[i - step] + 2 * up[i] + up[i + step]
+                            + 2 * (mid[i - step] + 2 * mid[i] + mid[i + step])
+                            + down[i - step] + 2 * down[i] + down[i + step]) >> 4)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def gaussian_blur(cnp.ndarray[DTYPE_t, ndim=3] image, out=None):
     """
     Apply Gaussian blur to an RGB image.
 
     Args:
         image: Input RGB image array with shape (height, width, 3)
+        out: Optional C-contiguous uint8 array with the same shape as image,
+            not overlapping it, to write the result into
 
     Returns:
-        Blurred image array with same shape and dtype
+        Blurred image array with same shape and dtype (out, if given)
     """
     cdef int height = image.shape[0]
     cdef int width = image.shape[1]
-    cdef int channels = image.shape[2]
+    cdef Py_ssize_t channels = image.shape[2]
+    cdef Py_ssize_t row_len = width * channels
 
-    # Create output array
-    cdef cnp.ndarray[DTYPE_t, ndim=3] output = np.zeros_like(image)
-
-    # Simple 3x3 Gaussian kernel (approximation)
-    cdef double kernel[3][3]
-    kernel[0][0] = 1.0/16; kernel[0][1] = 2.0/16; kernel[0][2] = 1.0/16
-    kernel[1][0] = 2.0/16; kernel[1][1] = 4.0/16; kernel[1][2] = 2.0/16
-    kernel[2][0] = 1.0/16; kernel[2][1] = 2.0/16; kernel[2][2] = 1.0/16
-
-    cdef int y, x, c, ky, kx
-    cdef double sum_val
-    cdef int ny, nx
-
-    # Apply convolution
-    for y in range(1, height-1):
-        for x in range(1, width-1):
-            for c in range(channels):
-                sum_val = 0.0
-                for ky in range(3):
-                    for kx in range(3):
-                        ny = y + ky - 1
-                        nx = x + kx - 1
-                        sum_val += image[ny, nx, c] * kernel[ky][kx]
-                output[y, x, c] = <DTYPE_t>sum_val
+    # Every pixel is written (interior here, borders below), so the output
+    # needs no initialization
+    cdef cnp.ndarray[DTYPE_t, ndim=3] output = _output_array(image, out)
+    image = np.ascontiguousarray(image)
+    cdef const DTYPE_t[:, ::1] src = image.reshape(height, row_len)
+    cdef DTYPE_t[:, ::1] dst = output.reshape(height, row_len)
+
+    cdef int y
+
+    # Apply convolution, rows in parallel
+    for y in prange(1, height-1, nogil=True, schedule="static"):
+        _gaussian_blur_row(&src[y-1, 0], &src[y, 0], &src[y+1, 0], &dst[y, 0], row_len, channels)
 
     # Copy borders
-    output[0, :, :] = image[0, :, :]
-    output[height-1, :, :] = image[height-1, :, :]
-    output[:, 0, :] = image[:, 0, :]
-    output[:, width-1, :] = image[:, width-1, :]
+    with nogil:
+        _fill_border(src, dst, 1, channels, False)
 
     return output
 
 
+@functools.lru_cache(maxsize=32)
+def _fixed_point_kernel(tuple weights):
+    """
+    Normalize and quantize 1D smoothing kernel weights to CONV1D_Q fixed point.
+
+    Results are cached, so repeated calls with the same kernel skip the
+    validation and conversion.
+
+    Args:
+        weights: Finite, non-negative kernel weights of odd length
+
+    Returns:
+        Read-only int16 array of non-negative weights scaled by 2^CONV1D_Q,
+        summing to exactly 2^CONV1D_Q
+    """
+    cdef cnp.ndarray[double, ndim=1] values = np.array(weights, dtype=np.float64)
+    if values.shape[0] % 2 == 0:
+        raise ValueError("Kernel must be a 1D array of odd length")
+    # NaN and inf weights (or a sum overflowing to inf) fail the finiteness
+    # check, which plain comparisons would let through
+    cdef double total = values.sum()
+    if np.any(values < 0) or not np.isfinite(total) or total <= 0:
+        raise ValueError("Kernel weights must be finite and non-negative with a positive sum")
+
+    # Largest-remainder rounding: floor every weight, then give the missing
+    # units to the taps with the largest fractional parts. Unlike folding the
+    # error into one tap, this keeps every weight non-negative and within one
+    # unit of its exact value. Ties (e.g. all taps of a flat kernel) go in
+    # order of bit-reversed distance from the centre, which spreads the extra
+    # units evenly across the kernel instead of bunching them in the middle.
+    scaled = values / total * (1 << CONV1D_Q)
+    fixed = np.floor(scaled).astype(np.int16)
+    distance = np.abs(np.arange(values.shape[0]) - values.shape[0] // 2)
+    spread = np.zeros_like(distance)
+    for bit in range(32):
+        spread |= ((distance >> bit) & 1) << (31 - bit)
+    order = np.lexsort((spread, fixed - scaled))
+    fixed[order[: (1 << CONV1D_Q) - fixed.sum()]] += 1
+
+    # The vertical pass of gaussian_blur_separable relies on this; checked
+    # once per kernel, since the result is cached
+    assert fixed.min() >= 0 and fixed.sum() == 1 << CONV1D_Q
+    fixed.flags.writeable = False
+    return fixed
+
+
 @cython.boundscheck(False)
 @cython.wraparound(False)
-def sharpen_filter(cnp.ndarray[DTYPE_t, ndim=3] image):
+def gaussian_blur_separable(image, kernel_1d, out=None):
     """
-    Apply a sharpening filter to an RGB image.
+    Apply a separable Gaussian blur to an RGB image or a single-channel plane.
+
+    The 2D kernel is the outer product of kernel_1d with itself, applied as a
+    horizontal pass followed by a vertical pass with fixed-point weights. Pixels
+    closer to the border than the kernel radius are copied from the input.
+
+    Both passes use weights with 2^-CONV1D_Q resolution and round their result
+    to uint8, including the intermediate rows between the passes. Results are
+    therefore within about two levels of an exact floating-point convolution
+    (typically 1-1.5 for Gaussian kernels), rather than exactly rounded.
 
     Args:
-        image: Input RGB image array with shape (height, width, 3)
+        image: Input RGB image array with shape (height, width, 3), or a plane
+            with shape (height, width)
+        kernel_1d: Finite, non-negative 1D kernel weights of odd length, normalized to sum to 1
+        out: Optional output array, as for gaussian_blur
 
     Returns:
-        Sharpened image array with same shape and dtype
+        Blurred image array with same shape and dtype (out, if given)
     """
-    cdef int height = image.shape[0]
-    cdef int width = image.shape[1]
-    cdef int channels = image.shape[2]
+    weights = np.asarray(kernel_1d, dtype=np.float64)
+    if weights.ndim != 1:
+        raise ValueError("Kernel must be a 1D array of odd length")
+    cdef const int16_t[::1] k = _fixed_point_kernel(tuple(weights.tolist()))
+
+    cdef cnp.ndarray[DTYPE_t, ndim=3] channels_last = _with_channel_axis(image)
+    cdef int height = channels_last.shape[0]
+    cdef int width = channels_last.shape[1]
+    cdef int channels = channels_last.shape[2]
+
+    cdef int ksize = k.shape[0]
+    cdef int radius = ksize // 2
+
+    cdef Py_ssize_t row_len = width * channels
+    cdef const DTYPE_t[:, ::1] src = np.ascontiguousarray(channels_last).reshape(height, row_len)
+    cdef cnp.ndarray result = _output_array(image, out)
+    cdef cnp.ndarray[DTYPE_t, ndim=3] output = _with_channel_axis(result)
+    cdef DTYPE_t[:, ::1] dst = output.reshape(height, row_len)
+
+    # The image is processed in horizontal strips: each strip, plus a halo of
+    # `radius` rows above and below, is filtered horizontally into a small
+    # buffer that the vertical pass consumes while it is still in cache
+    cdef int strip_rows = max(STRIP_BYTES // max(row_len, 1) - 2 * radius, ksize)
+    cdef int num_strips = (height - 2 * radius + strip_rows - 1) // strip_rows
+
+    # Interior of each row, as offsets into the flattened (width * channels) row
+    cdef Py_ssize_t lo = radius * channels
+    cdef Py_ssize_t hi = (width - radius) * channels
+
+    cdef int strip, y0, y1, y
+    cdef DTYPE_t[:, ::1] strip_bufs
+    cdef DTYPE_t *tmp = NULL
+
+    if width > 2 * radius:
+        # Strips are distributed across threads; each thread owns one buffer,
+        # allocated up front so that a failure raises MemoryError
+        strip_bufs = np.empty((omp_get_max_threads(), (strip_rows + 2 * radius) * row_len), dtype=np.uint8)
+
+        with nogil, parallel():
+            tmp = &strip_bufs[threadid(), 0]
+
+            for strip in prange(num_strips, schedule="static"):
+                y0 = radius + strip * strip_rows
+                y1 = min(y0 + strip_rows, height - radius)
+
+                # Horizontal pass; taps of one channel are `channels` bytes apart
+                for y in range(y0 - radius, y1 + radius):
+                    conv1d_u8(&src[y, lo], tmp + (y - y0 + radius) * row_len + lo, hi - lo, channels, &k[0], ksize)
+
+                # Vertical pass over the rows of the strip; taps are one row apart.
+                # _fixed_point_kernel asserts the precondition of the smoothing
+                # kernel variant: non-negative weights summing to 2^CONV1D_Q
+                for y in range(y0, y1):
+                    conv1d_u8_smooth(tmp + (y - y0 + radius) * row_len + lo, &dst[y, lo], hi - lo, row_len,
+                                     &k[0], ksize)
+
+    # Copy borders
+    with nogil:
+        _fill_border(src, dst, radius, channels, False)
 
-    cdef cnp.ndarray[DTYPE_t, ndim=3] output = np.zeros_like(image)
+    return result
 
-    # Sharpening kernel
-    cdef double kernel[3][3]
-    kernel[0][0] = 0; kernel[0][1] = -1; kernel[0][2] = 0
-    kernel[1][0] = -1; kernel[1][1] = 5; kernel[1][2] = -1
-    kernel[2][0] = 0; kernel[2][1] = -1; kernel[2][2] = 0
 
-    cdef int y, x, c, ky, kx
-    cdef double sum_val
-    cdef int ny, nx
+# Box filter averages divide by the box size through a fixed-point reciprocal
+# with this many fractional bits; exact for boxes up to 2^20 samples wide
+cdef enum:
+    BOX_RECIP_BITS = 48
 
-    for y in range(1, height-1):
-        for x in range(1, width-1):
-            for c in range(channels):
-                sum_val = 0.0
-                for ky in range(3):
-                    for kx in range(3):
-                        ny = y + ky - 1
-                        nx = x + kx - 1
-                        sum_val += image[ny, nx, c] * kernel[ky][kx]
 
-                # Clamp to valid range
-                if sum_val < 0:
-                    sum_val = 0
-                elif sum_val > 255:
-                    sum_val = 255
+cdef inline unsigned long long _box_reciprocal(int size) noexcept nogil:
+    return ((1ULL << BOX_RECIP_BITS) + size - 1) // size
 
-                output[y, x, c] = <DTYPE_t>sum_val
 
-    # Copy borders
-    output[0, :, :] = image[0, :, :]
-    output[height-1, :, :] = image[height-1, :, :]
-    output[:, 0, :] = image[:, 0, :]
-    output[:, width-1, :] = image[:, width-1, :]
+cdef inline DTYPE_t _box_average(unsigned int total, int size, unsigned long long recip) noexcept nogil:
+    # Rounded total / size, without an integer division per sample
+    return <DTYPE_t>(((total + size // 2) * recip) >> BOX_RECIP_BITS)
 
-    return output
+
+cdef void _box_pass_row(const DTYPE_t *src, DTYPE_t *dst, int n, int step, int radius) noexcept nogil:
+    # One box filter pass over n samples spaced `step` apart, using a running
+    # sum so the cost per sample does not depend on the radius. Samples past
+    # either end repeat the edge value.
+    cdef int size = 2 * radius + 1
+    cdef unsigned long long recip = _box_reciprocal(size)
+    cdef int last = n - 1
+    cdef unsigned int total = 0
+    cdef int i
+
+    for i in range(-radius, radius + 1):
+        total += src[min(max(i, 0), last) * step]
+
+    for i in range(n):
+        dst[i * step] = _box_average(total, size, recip)
+        total += src[min(i + radius + 1, last) * step]
+        total -= src[max(i - radius, 0) * step]
+
+
+cdef void _box_pass_columns(const DTYPE_t *src, DTYPE_t *dst, unsigned int *sums, int height,
+                            Py_ssize_t row_len, Py_ssize_t x0, Py_ssize_t x1, int radius) noexcept nogil:
+    # One vertical box filter pass over columns [x0, x1) of a (height, row_len)
+    # image. A running sum is kept per column, so each step reads whole rows
+    # and the inner loops stay contiguous.
+    cdef int size = 2 * radius + 1
+    cdef unsigned long long recip = _box_reciprocal(size)
+    cdef int last = height - 1
+    cdef const DTYPE_t *add_row
+    cdef const DTYPE_t *sub_row
+    cdef DTYPE_t *out_row
+    cdef int y
+    cdef Py_ssize_t x
+
+    for x in range(x0, x1):
+        sums[x] = 0
+
+    for y in range(-radius, radius + 1):
+        add_row = src + min(max(y, 0), last) * row_len
+        for x in range(x0, x1):
+            sums[x] += add_row[x]
+
+    for y in range(height):
+        out_row = dst + y * row_len
+        add_row = src + min(y + radius + 1, last) * row_len
+        sub_row = src + max(y - radius, 0) * row_len
+        for x in range(x0, x1):
+            out_row[x] = _box_average(sums[x], size, recip)
+            sums[x] += add_row[x]
+            sums[x] -= sub_row[x]
 
 
 @cython.boundscheck(False)
 @cython.wraparound(False)
-def edge_detection(cnp.ndarray[DTYPE_t, ndim=3] image):
+def box_blur(image, int radius=2, int passes=3, out=None):
     """
-    Apply edge detection (Sobel operator) to an RGB image.
+    Apply a fast approximate Gaussian blur to an RGB image or a single-channel plane.
+
+    The blur repeats a box filter horizontally and vertically (three passes
+    closely approximate a Gaussian). Each pass uses running sums, so the cost
+    per pixel does not depend on the radius. Edge pixels are repeated past the
+    border.
+
+    Args:
+        image: Input RGB image array with shape (height, width, 3), or a plane
+            with shape (height, width)
+        radius: Box filter radius in pixels; each box is 2 * radius + 1 wide
+        passes: Number of box filter passes in each direction
+        out: Optional output array, as for gaussian_blur
+
+    Returns:
+        Blurred image array with same shape and dtype (out, if given)
+    """
+    if radius < 0 or radius >= 1 << 19:
+        raise ValueError("Radius must be between 0 and 524287")
+    if passes < 1:
+        raise ValueError("Number of passes must be at least 1")
+
+    cdef cnp.ndarray[DTYPE_t, ndim=3] channels_last = _with_channel_axis(image)
+    cdef int height = channels_last.shape[0]
+    cdef int width = channels_last.shape[1]
+    cdef int channels = channels_last.shape[2]
+    cdef Py_ssize_t row_len = width * channels
+
+    cdef cnp.ndarray result = _output_array(image, out)
+    cdef cnp.ndarray[DTYPE_t, ndim=3] output = _with_channel_axis(result)
+    if output.size == 0:
+        return result
+
+    cdef const DTYPE_t[:, ::1] src = np.ascontiguousarray(channels_last).reshape(height, row_len)
+    cdef DTYPE_t[:, ::1] dst = output.reshape(height, row_len)
+    cdef DTYPE_t[:, ::1] scratch = np.empty((height, row_len), dtype=np.uint8)
+    cdef unsigned int[::1] sums = np.empty(row_len, dtype=np.uint32)
+
+    # The horizontal passes write to buf_a, then the vertical passes alternate
+    # a -> b -> a ...; pick the buffers so that the last pass lands in output
+    cdef DTYPE_t *buf_a = &scratch[0, 0] if passes % 2 == 1 else &dst[0, 0]
+    cdef DTYPE_t *buf_b = &dst[0, 0] if passes % 2 == 1 else &scratch[0, 0]
+
+    # Columns are filtered vertically in blocks spread across threads
+    cdef Py_ssize_t block = 256
+    cdef Py_ssize_t num_blocks = (row_len + block - 1) // block
+
+    cdef int y, c, p
+    cdef Py_ssize_t b, x0
+    cdef DTYPE_t *row_buf = NULL
+    cdef DTYPE_t[:, ::1] row_bufs = np.empty((omp_get_max_threads(), 2 * row_len), dtype=np.uint8)
+    cdef const DTYPE_t *row_src
+    cdef DTYPE_t *row_dst
+    cdef DTYPE_t *pass_src
+    cdef DTYPE_t *pass_dst
+
+    # Horizontal passes; each thread ping-pongs a row between its two row buffers
+    with nogil, parallel():
+        row_buf = &row_bufs[threadid(), 0]
+
+        for y in prange(height, schedule="static"):
+            for p in range(passes):
+                if p == 0:
+                    row_src = &src[y, 0]
+                else:
+                    row_src = row_buf + ((p - 1) % 2) * row_len
+                if p == passes - 1:
+                    row_dst = buf_a + y * row_len
+                else:
+                    row_dst = row_buf + (p % 2) * row_len
+
+                for c in range(channels):
+                    _box_pass_row(row_src + c, row_dst + c, width, channels, radius)
+
+    # Vertical passes
+    for p in range(passes):
+        if p % 2 == 0:
+            pass_src = buf_a
+            pass_dst = buf_b
+        else:
+            pass_src = buf_b
+            pass_dst = buf_a
+
+        for b in prange(num_blocks, nogil=True, schedule="static"):
+            x0 = b * block
+            _box_pass_columns(pass_src, pass_dst, &sums[0], height, row_len, x0, min(x0 + block, row_len), radius)
+
+    return result
+
+
+cdef void _sharpen_row(const DTYPE_t *up, const DTYPE_t *mid, const DTYPE_t *down, DTYPE_t *out,
+                       Py_ssize_t n, Py_ssize_t step) noexcept nogil:
+    # Sharpening kernel over one flattened row, with unit stride as in
+    # _gaussian_blur_row:
+    #      0 -1  0
+    #     -1  5 -1
+    #      0 -1  0
+    cdef Py_ssize_t i
+    cdef int sum_val
+
+    for i in range(step, n - step):
+        sum_val = 5 * mid[i] - up[i] - down[i] - mid[i - step] - mid[i + step]
+
+        # Clamp to valid range
+        if sum_val < 0:
+            sum_val = 0
+        elif sum_val > 255:
+            sum_val = 255
+
+        out[i] = <DTYPE_t>sum_val
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def sharpen_filter(cnp.ndarray[DTYPE_t, ndim=3] image, out=None):
+    """
+    Apply a sharpening filter to an RGB image.
 
     Args:
         image: Input RGB image array with shape (height, width, 3)
+        out: Optional output array, as for gaussian_blur
 
     Returns:
-        Edge-detected image array with same shape and dtype
+        Sharpened image array with same shape and dtype (out, if given)
     """
     cdef int height = image.shape[0]
     cdef int width = image.shape[1]
-    cdef int channels = image.shape[2]
+    cdef Py_ssize_t channels = image.shape[2]
+    cdef Py_ssize_t row_len = width * channels
+
+    cdef cnp.ndarray[DTYPE_t, ndim=3] output = _output_array(image, out)
+    image = np.ascontiguousarray(image)
+    cdef const DTYPE_t[:, ::1] src = image.reshape(height, row_len)
+    cdef DTYPE_t[:, ::1] dst = output.reshape(height, row_len)
+
+    cdef int y
+
+    for y in prange(1, height-1, nogil=True, schedule="static"):
+        _sharpen_row(&src[y-1, 0], &src[y, 0], &src[y+1, 0], &dst[y, 0], row_len, channels)
+
+    # Copy borders
+    with nogil:
+        _fill_border(src, dst, 1, channels, False)
+
+    return output
+
 
-    cdef cnp.ndarray[DTYPE_t, ndim=3] output = np.zeros_like(image)
+cdef void _edge_detection_row(const DTYPE_t *up, const DTYPE_t *mid, const DTYPE_t *down, DTYPE_t *out,
+                              Py_ssize_t n, Py_ssize_t step) noexcept nogil:
+    # Sobel operator over one flattened row, with unit stride as in
+    # _gaussian_blur_row:
+    #     gx: -1 0 1     gy: -1 -2 -1
+    #         -2 0 2          0  0  0
+    #         -1 0 1          1  2  1
+    cdef Py_ssize_t i
+    cdef int gx, gy
+    cdef float magnitude
 
-    # Sobel X kernel
-    cdef double sobel_x[3][3]
-    sobel_x[0][0] = -1; sobel_x[0][1] = 0; sobel_x[0][2] = 1
-    sobel_x[1][0] = -2; sobel_x[1][1] = 0; sobel_x[1][2] = 2
-    sobel_x[2][0] = -1; sobel_x[2][1] = 0; sobel_x[2][2] = 1
+    for i in range(step, n - step):
+        gx = (up[i + step] + 2 * mid[i + step] + down[i + step]) - (up[i - step] + 2 * mid[i - step] + down[i - step])
+        gy = (down[i - step] + 2 * down[i] + down[i + step]) - (up[i - step] + 2 * up[i] + up[i + step])
 
-    # Sobel Y kernel
-    cdef double sobel_y[3][3]
-    sobel_y[0][0] = -1; sobel_y[0][1] = -2; sobel_y[0][2] = -1
-    sobel_y[1][0] = 0; sobel_y[1][1] = 0; sobel_y[1][2] = 0
-    sobel_y[2][0] = 1; sobel_y[2][1] = 2; sobel_y[2][2] = 1
+        # gx*gx + gy*gy < 2^24 is exact in single precision, and truncating
+        # its square root gives the same integer as in double precision
+        magnitude = sqrtf(<float>(gx*gx + gy*gy))
+        if magnitude > 255:
+            magnitude = 255
 
-    cdef int y, x, c, ky, kx
-    cdef double gx, gy, magnitude
-    cdef int ny, nx
+        out[i] = <DTYPE_t>magnitude
 
-    for y in range(1, height-1):
-        for x in range(1, width-1):
-            for c in range(channels):
-                gx = 0.0
-                gy = 0.0
 
-                for ky in range(3):
-                    for kx in range(3):
-                        ny = y + ky - 1
-                        nx = x + kx - 1
-                        gx += image[ny, nx, c] * sobel_x[ky][kx]
-                        gy += image[ny, nx, c] * sobel_y[ky][kx]
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def edge_detection(cnp.ndarray[DTYPE_t, ndim=3] image, out=None):
+    """
+    Apply edge detection (Sobel operator) to an RGB image.
+
+    Args:
+        image: Input RGB image array with shape (height, width, 3)
+        out: Optional output array, as for gaussian_blur
 
-                magnitude = sqrt(gx*gx + gy*gy)
-                if magnitude > 255:
-                    magnitude = 255
+    Returns:
+        Edge-detected image array with same shape and dtype (out, if given)
+    """
+    cdef int height = image.shape[0]
+    cdef Py_ssize_t channels = image.shape[2]
+    cdef Py_ssize_t row_len = image.shape[1] * channels
 
-                output[y, x, c] = <DTYPE_t>magnitude
+    cdef cnp.ndarray[DTYPE_t, ndim=3] output = _output_array(image, out)
+    image = np.ascontiguousarray(image)
+    cdef const DTYPE_t[:, ::1] src = image.reshape(height, row_len)
+    cdef DTYPE_t[:, ::1] dst = output.reshape(height, row_len)
+
+    cdef int y
+
+    for y in prange(1, height-1, nogil=True, schedule="static"):
+        _edge_detection_row(&src[y-1, 0], &src[y, 0], &src[y+1, 0], &dst[y, 0], row_len, channels)
+
+    # The operator is undefined on the border, which is left black
+    with nogil:
+        _fill_border(src, dst, 1, channels, True)
 
     return output
 
 
 @cython.boundscheck(False)
 @cython.wraparound(False)
-def adjust_brightness(cnp.ndarray[DTYPE_t, ndim=3] image, double factor):
+def adjust_brightness(cnp.ndarray[DTYPE_t, ndim=3] image, double factor, out=None):
     """
     Adjust brightness of an RGB image.
 
     Args:
         image: Input RGB image array with shape (height, width, 3)
         factor: Brightness multiplication factor (1.0 = no change, >1.0 = brighter)
+        out: Optional output array, as for gaussian_blur; may also be image
+            itself to adjust it in place
 
     Returns:
-        Brightness-adjusted image array with same shape and dtype
+        Brightness-adjusted image array with same shape and dtype (out, if given)
     """
     cdef int height = image.shape[0]
     cdef int width = image.shape[1]
     cdef int channels = image.shape[2]
 
-    cdef cnp.ndarray[DTYPE_t, ndim=3] output = np.zeros_like(image)
-
-    cdef int y, x, c
+    # Brightness is a per-value map, so evaluate it once for each of the 256
+    # possible inputs and apply it to the image as a table lookup
+    cdef DTYPE_t lut[256]
+    cdef int v
     cdef double new_val
 
-    for y in range(height):
-        for x in range(width):
-            for c in range(channels):
-                new_val = image[y, x, c] * factor
+    for v in range(256):
+        new_val = v * factor
+
+        # Clamp to valid range
+        if new_val > 255:
+            new_val = 255
+        elif new_val < 0:
+            new_val = 0
+
+        lut[v] = <DTYPE_t>new_val
+
+    cdef const DTYPE_t[::1] src = np.ascontiguousarray(image).reshape(-1)
+    cdef cnp.ndarray[DTYPE_t, ndim=3] output = _output_array(image, out, in_place=True)
+    cdef DTYPE_t[::1] dst = output.reshape(-1)
+
+    cdef Py_ssize_t i
+
+    for i in prange(src.shape[0], nogil=True, schedule="static"):
+        dst[i] = lut[src[i]]
+
+    return output
+
+
+cdef void _row_stats(const DTYPE_t *p, Py_ssize_t n, DTYPE_t *lo, DTYPE_t *hi,
+                     unsigned long long *total) noexcept nogil:
+    # Min, max and sum of one row in a single pass; plain accumulator loops
+    # that the compiler vectorizes
+    cdef DTYPE_t row_lo = 255
+    cdef DTYPE_t row_hi = 0
+    cdef unsigned long long row_total = 0
+    cdef Py_ssize_t i
+
+    for i in range(n):
+        row_lo = min(row_lo, p[i])
+        row_hi = max(row_hi, p[i])
+        row_total += p[i]
+
+    lo[0] = row_lo
+    hi[0] = row_hi
+    total[0] = row_total
+
+
+def image_stats(image):
+    """
+    Compute the minimum, maximum and mean value of an image in one pass.
+
+    Args:
+        image: Input uint8 image array of any shape
+
+    Returns:
+        Tuple (min, max, mean); (0, 0, 0.0) for an empty image
+    """
+    cdef cnp.ndarray flat = np.ascontiguousarray(image)
+    if flat.dtype != np.uint8:
+        raise ValueError("Input array must have dtype uint8")
+    if flat.size == 0:
+        return 0, 0, 0.0
+
+    # Rows of the innermost two axes, reduced in parallel and combined below.
+    # Arrays with fewer than two axes are one row; shape is a raw C array, so
+    # it is only indexed once ndim is known to be at least two.
+    cdef Py_ssize_t row_len = flat.size if flat.ndim < 2 else flat.shape[flat.ndim - 1] * flat.shape[flat.ndim - 2]
+    cdef const DTYPE_t[:, ::1] src = flat.reshape(-1, row_len)
+    cdef Py_ssize_t rows = src.shape[0]
+
+    cdef DTYPE_t[::1] lo = np.empty(rows, dtype=np.uint8)
+    cdef DTYPE_t[::1] hi = np.empty(rows, dtype=np.uint8)
+    cdef unsigned long long[::1] totals = np.empty(rows, dtype=np.uint64)
+
+    cdef Py_ssize_t y
+
+    for y in prange(rows, nogil=True, schedule="static"):
+        _row_stats(&src[y, 0], row_len, &lo[y], &hi[y], &totals[y])
+
+    return int(np.min(lo)), int(np.max(hi)), float(np.sum(totals)) / flat.size
+
+
+def deinterleave_rgb(image):
+    """
+    Split an interleaved RGB image into one plane per channel.
+
+    Args:
+        image: Input RGB image array with shape (height, width, 3)
+
+    Returns:
+        C-contiguous array with shape (3, height, width)
+    """
+    if image.ndim != 3 or image.shape[2] != 3:
+        raise ValueError("Input must be a 3D array with shape (height, width, 3)")
+
+    cdef const DTYPE_t[:, :, ::1] src = np.ascontiguousarray(image)
+    cdef int height = src.shape[0]
+    cdef int width = src.shape[1]
+
+    cdef cnp.ndarray[DTYPE_t, ndim=3] output = np.empty((3, height, width), dtype=np.uint8)
+    cdef DTYPE_t[:, :, ::1] dst = output
+
+    cdef int y
+
+    if width == 0:
+        return output
+
+    for y in prange(height, nogil=True, schedule="static"):
+        rgb_deinterleave_u8(&src[y, 0, 0], &dst[0, y, 0], &dst[1, y, 0], &dst[2, y, 0], width)
+
+    return output
+
+
+def interleave_rgb(r, g, b):
+    """
+    Merge three channel planes into an interleaved RGB image.
+
+    Args:
+        r: Red plane with shape (height, width)
+        g: Green plane with the same shape
+        b: Blue plane with the same shape
+
+    Returns:
+        Interleaved RGB image array with shape (height, width, 3)
+    """
+    cdef const DTYPE_t[:, ::1] src_r = np.ascontiguousarray(r)
+    cdef const DTYPE_t[:, ::1] src_g = np.ascontiguousarray(g)
+    cdef const DTYPE_t[:, ::1] src_b = np.ascontiguousarray(b)
+    cdef int height = src_r.shape[0]
+    cdef int width = src_r.shape[1]
+
+    if (src_g.shape[0] != height or src_g.shape[1] != width
+            or src_b.shape[0] != height or src_b.shape[1] != width):
+        raise ValueError("Channel planes must all have the same shape")
+
+    cdef cnp.ndarray[DTYPE_t, ndim=3] output = np.empty((height, width, 3), dtype=np.uint8)
+    cdef DTYPE_t[:, :, ::1] dst = output
+
+    cdef int y
 
-                # Clamp to valid range
-                if new_val > 255:
-                    new_val = 255
-                elif new_val < 0:
-                    new_val = 0
+    if width == 0:
+        return output
 
-                output[y, x, c] = <DTYPE_t>new_val
+    for y in prange(height, nogil=True, schedule="static"):
+        rgb_interleave_u8(&src_r[y, 0], &src_g[y, 0], &src_b[y, 0], &dst[y, 0, 0], width)
 
     return output
@@ -0,0 +1,376 @@
+/*
+ * 1D convolution kernels for uint8 image data with fixed-point weights.
+ *
+ * The SIMD variants are compiled with per-function target attributes, and
+ * conv1d_init() picks the widest one the running CPU supports, so the
+ * extension still loads on CPUs without AVX2 or AVX-512. Other compilers and
+ * architectures use the scalar loop only.
+ */
+
+#include <string.h>
+
+#include "simd_conv1d.h"
+
+#if defined(__GNUC__) && (defined(__x86_64__) || defined(__i386__))
+#define CONV1D_HAVE_X86 1
+#include <immintrin.h>
+#endif
+
+/* A SIMD kernel processes whole vectors and returns the number of outputs written */
+typedef ptrdiff_t (*conv1d_simd_fn)(const uint8_t *src, uint8_t *dst, ptrdiff_t n, ptrdiff_t step, const int16_t *k,
+                                    int ksize);
+
+static conv1d_simd_fn conv1d_u8_simd = NULL;
+static conv1d_simd_fn conv1d_u8_smooth_simd = NULL;
+static const char *conv1d_backend_name = "scalar";
+
+static void conv1d_u8_scalar(const uint8_t *src, uint8_t *dst, ptrdiff_t n, ptrdiff_t step, const int16_t *k,
+                             int ksize)
+{
+    const ptrdiff_t radius = ksize / 2;
+    ptrdiff_t i;
+    int j;
+
+    for (i = 0; i < n; i++) {
+        const uint8_t *p = src + i - radius * step;
+        int32_t acc = 1 << (CONV1D_Q - 1);
+
+        for (j = 0; j < ksize; j++) {
+            acc += k[j] * p[j * step];
+        }
+        acc >>= CONV1D_Q;
+
+        dst[i] = (uint8_t)(acc < 0 ? 0 : (acc > 255 ? 255 : acc));
+    }
+}
+
+#ifdef CONV1D_HAVE_X86
+/*
+ * General kernels: pixels are widened to 16 bits and interleaved tap-pair by
+ * tap-pair, so one madd_epi16 applies two kernel weights at once into 32-bit
+ * sums. The unpack and pack instructions both work within 128-bit lanes, so
+ * packing the sums back reverses the unpacking and restores the pixel order.
+ *
+ * Smooth kernels (non-negative weights summing to at most 2^CONV1D_Q): each
+ * weighted pixel and the running sum stay below 2^16, so taps are applied one
+ * at a time with mullo_epi16 and saturating adds.
+ */
+
+static inline uint32_t conv1d_weight_pair(const int16_t *k, int j, int ksize)
+{
+    const uint32_t w0 = (uint16_t)k[j];
+    const uint32_t w1 = j + 1 < ksize ? (uint16_t)k[j + 1] : 0;
+    return w0 | (w1 << 16);
+}
+
+static inline __attribute__((always_inline, target("sse2"))) ptrdiff_t
+conv1d_u8_sse2_body(const uint8_t *src, uint8_t *dst, ptrdiff_t n, ptrdiff_t step, const int16_t *k, int ksize)
+{
+    const ptrdiff_t radius = ksize / 2;
+    const __m128i zero = _mm_setzero_si128();
+    const __m128i half = _mm_set1_epi32(1 << (CONV1D_Q - 1));
+    ptrdiff_t i;
+    int j;
+
+    for (i = 0; i + 16 <= n; i += 16) {
+        const uint8_t *p = src + i - radius * step;
+        __m128i acc0 = half, acc1 = half, acc2 = half, acc3 = half;
+
+        for (j = 0; j < ksize; j += 2) {
+            const __m128i w = _mm_set1_epi32((int32_t)conv1d_weight_pair(k, j, ksize));
+            const __m128i a = _mm_loadu_si128((const __m128i *)(p + j * step));
+            const __m128i b = j + 1 < ksize ? _mm_loadu_si128((const __m128i *)(p + (j + 1) * step)) : zero;
+
+            const __m128i a_lo = _mm_unpacklo_epi8(a, zero);
+            const __m128i a_hi = _mm_unpackhi_epi8(a, zero);
+            const __m128i b_lo = _mm_unpacklo_epi8(b, zero);
+            const __m128i b_hi = _mm_unpackhi_epi8(b, zero);
+
+            acc0 = _mm_add_epi32(acc0, _mm_madd_epi16(_mm_unpacklo_epi16(a_lo, b_lo), w));
+            acc1 = _mm_add_epi32(acc1, _mm_madd_epi16(_mm_unpackhi_epi16(a_lo, b_lo), w));
+            acc2 = _mm_add_epi32(acc2, _mm_madd_epi16(_mm_unpacklo_epi16(a_hi, b_hi), w));
+            acc3 = _mm_add_epi32(acc3, _mm_madd_epi16(_mm_unpackhi_epi16(a_hi, b_hi), w));
+        }
+
+        acc0 = _mm_srai_epi32(acc0, CONV1D_Q);
+        acc1 = _mm_srai_epi32(acc1, CONV1D_Q);
+        acc2 = _mm_srai_epi32(acc2, CONV1D_Q);
+        acc3 = _mm_srai_epi32(acc3, CONV1D_Q);
+
+        _mm_storeu_si128((__m128i *)(dst + i),
+                         _mm_packus_epi16(_mm_packs_epi32(acc0, acc1), _mm_packs_epi32(acc2, acc3)));
+    }
+
+    return i;
+}
+
+static inline __attribute__((always_inline, target("sse2"))) ptrdiff_t
+conv1d_u8_smooth_sse2_body(const uint8_t *src, uint8_t *dst, ptrdiff_t n, ptrdiff_t step, const int16_t *k, int ksize)
+{
+    const ptrdiff_t radius = ksize / 2;
+    const __m128i zero = _mm_setzero_si128();
+    const __m128i half = _mm_set1_epi16(1 << (CONV1D_Q - 1));
+    ptrdiff_t i;
+    int j;
+
+    for (i = 0; i + 16 <= n; i += 16) {
+        const uint8_t *p = src + i - radius * step;
+        __m128i acc_lo = half, acc_hi = half;
+
+        for (j = 0; j < ksize; j++) {
+            const __m128i w = _mm_set1_epi16(k[j]);
+            const __m128i a = _mm_loadu_si128((const __m128i *)(p + j * step));
+
+            acc_lo = _mm_adds_epu16(acc_lo, _mm_mullo_epi16(_mm_unpacklo_epi8(a, zero), w));
+            acc_hi = _mm_adds_epu16(acc_hi, _mm_mullo_epi16(_mm_unpackhi_epi8(a, zero), w));
+        }
+
+        acc_lo = _mm_srli_epi16(acc_lo, CONV1D_Q);
+        acc_hi = _mm_srli_epi16(acc_hi, CONV1D_Q);
+
+        _mm_storeu_si128((__m128i *)(dst + i), _mm_packus_epi16(acc_lo, acc_hi));
+    }
+
+    return i;
+}
+
+static inline __attribute__((always_inline, target("avx2"))) ptrdiff_t
+conv1d_u8_avx2_body(const uint8_t *src, uint8_t *dst, ptrdiff_t n, ptrdiff_t step, const int16_t *k, int ksize)
+{
+    const ptrdiff_t radius = ksize / 2;
+    const __m256i zero = _mm256_setzero_si256();
+    const __m256i half = _mm256_set1_epi32(1 << (CONV1D_Q - 1));
+    ptrdiff_t i;
+    int j;
+
+    for (i = 0; i + 32 <= n; i += 32) {
+        const uint8_t *p = src + i - radius * step;
+        __m256i acc0 = half, acc1 = half, acc2 = half, acc3 = half;
+
+        for (j = 0; j < ksize; j += 2) {
+            const __m256i w = _mm256_set1_epi32((int32_t)conv1d_weight_pair(k, j, ksize));
+            const __m256i a = _mm256_loadu_si256((const __m256i *)(p + j * step));
+            const __m256i b = j + 1 < ksize ? _mm256_loadu_si256((const __m256i *)(p + (j + 1) * step)) : zero;
+
+            const __m256i a_lo = _mm256_unpacklo_epi8(a, zero);
+            const __m256i a_hi = _mm256_unpackhi_epi8(a, zero);
+            const __m256i b_lo = _mm256_unpacklo_epi8(b, zero);
+            const __m256i b_hi = _mm256_unpackhi_epi8(b, zero);
+
+            acc0 = _mm256_add_epi32(acc0, _mm256_madd_epi16(_mm256_unpacklo_epi16(a_lo, b_lo), w));
+            acc1 = _mm256_add_epi32(acc1, _mm256_madd_epi16(_mm256_unpackhi_epi16(a_lo, b_lo), w));
+            acc2 = _mm256_add_epi32(acc2, _mm256_madd_epi16(_mm256_unpacklo_epi16(a_hi, b_hi), w));
+            acc3 = _mm256_add_epi32(acc3, _mm256_madd_epi16(_mm256_unpackhi_epi16(a_hi, b_hi), w));
+        }
+
+        acc0 = _mm256_srai_epi32(acc0, CONV1D_Q);
+        acc1 = _mm256_srai_epi32(acc1, CONV1D_Q);
+        acc2 = _mm256_srai_epi32(acc2, CONV1D_Q);
+        acc3 = _mm256_srai_epi32(acc3, CONV1D_Q);
+
+        _mm256_storeu_si256((__m256i *)(dst + i),
+                            _mm256_packus_epi16(_mm256_packs_epi32(acc0, acc1), _mm256_packs_epi32(acc2, acc3)));
+    }
+
+    return i;
+}
+
+static inline __attribute__((always_inline, target("avx2"))) ptrdiff_t
+conv1d_u8_smooth_avx2_body(const uint8_t *src, uint8_t *dst, ptrdiff_t n, ptrdiff_t step, const int16_t *k, int ksize)
+{
+    const ptrdiff_t radius = ksize / 2;
+    const __m256i zero = _mm256_setzero_si256();
+    const __m256i half = _mm256_set1_epi16(1 << (CONV1D_Q - 1));
+    ptrdiff_t i;
+    int j;
+
+    for (i = 0; i + 32 <= n; i += 32) {
+        const uint8_t *p = src + i - radius * step;
+        __m256i acc_lo = half, acc_hi = half;
+
+        for (j = 0; j < ksize; j++) {
+            const __m256i w = _mm256_set1_epi16(k[j]);
+            const __m256i a = _mm256_loadu_si256((const __m256i *)(p + j * step));
+
+            acc_lo = _mm256_adds_epu16(acc_lo, _mm256_mullo_epi16(_mm256_unpacklo_epi8(a, zero), w));
+            acc_hi = _mm256_adds_epu16(acc_hi, _mm256_mullo_epi16(_mm256_unpackhi_epi8(a, zero), w));
+        }
+
+        acc_lo = _mm256_srli_epi16(acc_lo, CONV1D_Q);
+        acc_hi = _mm256_srli_epi16(acc_hi, CONV1D_Q);
+
+        _mm256_storeu_si256((__m256i *)(dst + i), _mm256_packus_epi16(acc_lo, acc_hi));
+    }
+
+    return i;
+}
+
+static inline __attribute__((always_inline, target("avx512f,avx512bw"))) ptrdiff_t
+conv1d_u8_avx512_body(const uint8_t *src, uint8_t *dst, ptrdiff_t n, ptrdiff_t step, const int16_t *k, int ksize)
+{
+    const ptrdiff_t radius = ksize / 2;
+    const __m512i zero = _mm512_setzero_si512();
+    const __m512i half = _mm512_set1_epi32(1 << (CONV1D_Q - 1));
+    ptrdiff_t i;
+    int j;
+
+    for (i = 0; i + 64 <= n; i += 64) {
+        const uint8_t *p = src + i - radius * step;
+        __m512i acc0 = half, acc1 = half, acc2 = half, acc3 = half;
+
+        for (j = 0; j < ksize; j += 2) {
+            const __m512i w = _mm512_set1_epi32((int32_t)conv1d_weight_pair(k, j, ksize));
+            const __m512i a = _mm512_loadu_si512((const void *)(p + j * step));
+            const __m512i b = j + 1 < ksize ? _mm512_loadu_si512((const void *)(p + (j + 1) * step)) : zero;
+
+            const __m512i a_lo = _mm512_unpacklo_epi8(a, zero);
+            const __m512i a_hi = _mm512_unpackhi_epi8(a, zero);
+            const __m512i b_lo = _mm512_unpacklo_epi8(b, zero);
+            const __m512i b_hi = _mm512_unpackhi_epi8(b, zero);
+
+            acc0 = _mm512_add_epi32(acc0, _mm512_madd_epi16(_mm512_unpacklo_epi16(a_lo, b_lo), w));
+            acc1 = _mm512_add_epi32(acc1, _mm512_madd_epi16(_mm512_unpackhi_epi16(a_lo, b_lo), w));
+            acc2 = _mm512_add_epi32(acc2, _mm512_madd_epi16(_mm512_unpacklo_epi16(a_hi, b_hi), w));
+            acc3 = _mm512_add_epi32(acc3, _mm512_madd_epi16(_mm512_unpackhi_epi16(a_hi, b_hi), w));
+        }
+
+        acc0 = _mm512_srai_epi32(acc0, CONV1D_Q);
+        acc1 = _mm512_srai_epi32(acc1, CONV1D_Q);
+        acc2 = _mm512_srai_epi32(acc2, CONV1D_Q);
+        acc3 = _mm512_srai_epi32(acc3, CONV1D_Q);
+
+        _mm512_storeu_si512((void *)(dst + i),
+                            _mm512_packus_epi16(_mm512_packs_epi32(acc0, acc1), _mm512_packs_epi32(acc2, acc3)));
+    }
+
+    return i;
+}
+
+static inline __attribute__((always_inline, target("avx512f,avx512bw"))) ptrdiff_t
+conv1d_u8_smooth_avx512_body(const uint8_t *src, uint8_t *dst, ptrdiff_t n, ptrdiff_t step, const int16_t *k, int ksize)
+{
+    const ptrdiff_t radius = ksize / 2;
+    const __m512i zero = _mm512_setzero_si512();
+    const __m512i half = _mm512_set1_epi16(1 << (CONV1D_Q - 1));
+    ptrdiff_t i;
+    int j;
+
+    for (i = 0; i + 64 <= n; i += 64) {
+        const uint8_t *p = src + i - radius * step;
+        __m512i acc_lo = half, acc_hi = half;
+
+        for (j = 0; j < ksize; j++) {
+            const __m512i w = _mm512_set1_epi16(k[j]);
+            const __m512i a = _mm512_loadu_si512((const void *)(p + j * step));
+
+            acc_lo = _mm512_adds_epu16(acc_lo, _mm512_mullo_epi16(_mm512_unpacklo_epi8(a, zero), w));
+            acc_hi = _mm512_adds_epu16(acc_hi, _mm512_mullo_epi16(_mm512_unpackhi_epi8(a, zero), w));
+        }
+
+        acc_lo = _mm512_srli_epi16(acc_lo, CONV1D_Q);
+        acc_hi = _mm512_srli_epi16(acc_hi, CONV1D_Q);
+
+        _mm512_storeu_si512((void *)(dst + i), _mm512_packus_epi16(acc_lo, acc_hi));
+    }
+
+    return i;
+}
+/*
+ * Each backend entry point dispatches the common kernel sizes to copies of
+ * the kernel body with the size as a constant, so the compiler can fully
+ * unroll the tap loop; other sizes use the generic loop.
+ */
+#define CONV1D_SPECIALIZE(name, isa)                                                                                \
+    __attribute__((target(isa))) static ptrdiff_t name(const uint8_t *src, uint8_t *dst, ptrdiff_t n,            \
+                                                       ptrdiff_t step, const int16_t *k, int ksize)              \
+    {                                                                                                             \
+        switch (ksize) {                                                                                          \
+        case 3:                                                                                                   \
+            return name##_body(src, dst, n, step, k, 3);                                                          \
+        case 5:                                                                                                   \
+            return name##_body(src, dst, n, step, k, 5);                                                          \
+        case 7:                                                                                                   \
+            return name##_body(src, dst, n, step, k, 7);                                                          \
+        default:                                                                                                  \
+            return name##_body(src, dst, n, step, k, ksize);                                                      \
+        }                                                                                                         \
+    }
+
+CONV1D_SPECIALIZE(conv1d_u8_sse2, "sse2")
+CONV1D_SPECIALIZE(conv1d_u8_smooth_sse2, "sse2")
+CONV1D_SPECIALIZE(conv1d_u8_avx2, "avx2")
+CONV1D_SPECIALIZE(conv1d_u8_smooth_avx2, "avx2")
+CONV1D_SPECIALIZE(conv1d_u8_avx512, "avx512f,avx512bw")
+CONV1D_SPECIALIZE(conv1d_u8_smooth_avx512, "avx512f,avx512bw")
+#endif /* CONV1D_HAVE_X86 */
+
+int conv1d_set_backend(const char *name)
+{
+    if (strcmp(name, "scalar") == 0) {
+        conv1d_u8_simd = NULL;
+        conv1d_u8_smooth_simd = NULL;
+        conv1d_backend_name = "scalar";
+        return 0;
+    }
+
+#ifdef CONV1D_HAVE_X86
+    __builtin_cpu_init();
+
+    if (strcmp(name, "sse2") == 0 && __builtin_cpu_supports("sse2")) {
+        conv1d_u8_simd = conv1d_u8_sse2;
+        conv1d_u8_smooth_simd = conv1d_u8_smooth_sse2;
+        conv1d_backend_name = "sse2";
+        return 0;
+    }
+    if (strcmp(name, "avx2") == 0 && __builtin_cpu_supports("avx2")) {
+        conv1d_u8_simd = conv1d_u8_avx2;
+        conv1d_u8_smooth_simd = conv1d_u8_smooth_avx2;
+        conv1d_backend_name = "avx2";
+        return 0;
+    }
+    if (strcmp(name, "avx512bw") == 0 && __builtin_cpu_supports("avx512f") && __builtin_cpu_supports("avx512bw")) {
+        conv1d_u8_simd = conv1d_u8_avx512;
+        conv1d_u8_smooth_simd = conv1d_u8_smooth_avx512;
+        conv1d_backend_name = "avx512bw";
+        return 0;
+    }
+#endif
+
+    return -1;
+}
+
+void conv1d_init(void)
+{
+    /* Widest first; "scalar" always succeeds */
+    static const char *const preferred[] = {"avx512bw", "avx2", "sse2", "scalar"};
+    size_t i;
+
+    for (i = 0; i < sizeof(preferred) / sizeof(preferred[0]); i++) {
+        if (conv1d_set_backend(preferred[i]) == 0) {
+            return;
+        }
+    }
+}
+
+const char *conv1d_backend(void)
+{
+    return conv1d_backend_name;
+}
+
+void conv1d_u8(const uint8_t *src, uint8_t *dst, ptrdiff_t n, ptrdiff_t step, const int16_t *k, int ksize)
+{
+    const conv1d_simd_fn simd = conv1d_u8_simd;
+    const ptrdiff_t done = simd ? simd(src, dst, n, step, k, ksize) : 0;
+
+    /* Remaining tail (or everything, with the scalar backend) */
+    conv1d_u8_scalar(src + done, dst + done, n - done, step, k, ksize);
+}
+
+void conv1d_u8_smooth(const uint8_t *src, uint8_t *dst, ptrdiff_t n, ptrdiff_t step, const int16_t *k, int ksize)
+{
+    const conv1d_simd_fn simd = conv1d_u8_smooth_simd;
+    const ptrdiff_t done = simd ? simd(src, dst, n, step, k, ksize) : 0;
+
+    /* The scalar loop gives identical results for kernels meeting the precondition */
+    conv1d_u8_scalar(src + done, dst + done, n - done, step, k, ksize);
+}
@@ -0,0 +1,51 @@
+/*
+ * 1D convolution kernels for uint8 image data with fixed-point weights.
+ */
+
+#ifndef SIMD_CONV1D_H
+#define SIMD_CONV1D_H
+
+#include <stddef.h>
+#include <stdint.h>
+
+/* Number of fractional bits in the fixed-point kernel weights */
+#define CONV1D_Q 8
+
+/*
+ * Convolve n consecutive uint8 samples with a kernel of ksize (odd) taps.
+ *
+ * Tap j of output i reads src[i + (j - ksize / 2) * step], so step is the
+ * distance between neighbouring pixels of one channel (3 along an RGB row).
+ * Weights are scaled by 2^CONV1D_Q; results are rounded and clamped to uint8.
+ */
+void conv1d_u8(const uint8_t *src, uint8_t *dst, ptrdiff_t n, ptrdiff_t step, const int16_t *k, int ksize);
+
+/*
+ * Same as conv1d_u8, for kernels whose weights are non-negative and sum to at
+ * most 2^CONV1D_Q, such as normalized smoothing kernels. Every partial sum
+ * then fits in 16 bits, which allows a cheaper SIMD path; this suits vertical
+ * passes, where step is the row stride and all loads are whole rows.
+ *
+ * The SIMD paths saturate for kernels outside that precondition, so their
+ * results then differ from conv1d_u8; callers must check it and use
+ * conv1d_u8 for any other kernel.
+ */
+void conv1d_u8_smooth(const uint8_t *src, uint8_t *dst, ptrdiff_t n, ptrdiff_t step, const int16_t *k, int ksize);
+
+/*
+ * Select the widest SIMD backend supported by the running CPU. Call once
+ * before the kernels are used; until then they run the scalar loop.
+ */
+void conv1d_init(void);
+
+/*
+ * Select a backend by name ("scalar", "sse2", "avx2" or "avx512bw").
+ * Returns 0 on success, or -1 if it is unknown or unsupported by the CPU.
+ * Not thread-safe with respect to concurrent kernel calls.
+ */
+int conv1d_set_backend(const char *name);
+
+/* Name of the backend currently in use */
+const char *conv1d_backend(void);
+
+#endif /* SIMD_CONV1D_H */
@@ -0,0 +1,147 @@
+/*
+ * Conversion between interleaved RGB and planar uint8 image data.
+ *
+ * As in simd_conv1d.c, the AVX2 variant is compiled with a target attribute
+ * and selected at run time by rgb_init(); other compilers and architectures
+ * use the scalar loop only.
+ */
+
+#include "simd_rgb.h"
+
+#if defined(__GNUC__) && (defined(__x86_64__) || defined(__i386__))
+#define RGB_HAVE_X86 1
+#include <immintrin.h>
+#endif
+
+/* A SIMD variant processes blocks of pixels and returns the number converted */
+typedef ptrdiff_t (*rgb_deinterleave_fn)(const uint8_t *src, uint8_t *r, uint8_t *g, uint8_t *b, ptrdiff_t n);
+typedef ptrdiff_t (*rgb_interleave_fn)(const uint8_t *r, const uint8_t *g, const uint8_t *b, uint8_t *dst,
+                                       ptrdiff_t n);
+
+static rgb_deinterleave_fn rgb_deinterleave_simd = NULL;
+static rgb_interleave_fn rgb_interleave_simd = NULL;
+
+#ifdef RGB_HAVE_X86
+/*
+ * 32 pixels (96 bytes) at a time. The three 32-byte loads are regrouped with
+ * permute2x128 so that the low 128-bit lanes hold pixels 0-15 and the high
+ * lanes pixels 16-31; within each lane, pixel p's channel c is then byte
+ * 3p + c of the three registers taken together. pshufb works per lane, so one
+ * set of masks gathers each channel from the three registers for both halves
+ * at once (-1 entries clear the byte, so the partial shuffles can be or-ed).
+ */
+
+#define RGB_MASK(...) _mm256_broadcastsi128_si256(_mm_setr_epi8(__VA_ARGS__))
+
+__attribute__((target("avx2"))) static ptrdiff_t rgb_deinterleave_avx2(const uint8_t *src, uint8_t *r, uint8_t *g,
+                                                                      uint8_t *b, ptrdiff_t n)
+{
+    const __m256i r0 = RGB_MASK(0, 3, 6, 9, 12, 15, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1);
+    const __m256i r1 = RGB_MASK(-1, -1, -1, -1, -1, -1, 2, 5, 8, 11, 14, -1, -1, -1, -1, -1);
+    const __m256i r2 = RGB_MASK(-1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 1, 4, 7, 10, 13);
+    const __m256i g0 = RGB_MASK(1, 4, 7, 10, 13, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1);
+    const __m256i g1 = RGB_MASK(-1, -1, -1, -1, -1, 0, 3, 6, 9, 12, 15, -1, -1, -1, -1, -1);
+    const __m256i g2 = RGB_MASK(-1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 2, 5, 8, 11, 14);
+    const __m256i b0 = RGB_MASK(2, 5, 8, 11, 14, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1);
+    const __m256i b1 = RGB_MASK(-1, -1, -1, -1, -1, 1, 4, 7, 10, 13, -1, -1, -1, -1, -1, -1);
+    const __m256i b2 = RGB_MASK(-1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 0, 3, 6, 9, 12, 15);
+    ptrdiff_t i;
+
+    for (i = 0; i + 32 <= n; i += 32) {
+        const __m256i l0 = _mm256_loadu_si256((const __m256i *)(src + 3 * i));
+        const __m256i l1 = _mm256_loadu_si256((const __m256i *)(src + 3 * i + 32));
+        const __m256i l2 = _mm256_loadu_si256((const __m256i *)(src + 3 * i + 64));
+
+        /* Bytes 0-15 | 48-63, 16-31 | 64-79 and 32-47 | 80-95 */
+        const __m256i a = _mm256_permute2x128_si256(l0, l1, 0x30);
+        const __m256i m = _mm256_permute2x128_si256(l0, l2, 0x21);
+        const __m256i c = _mm256_permute2x128_si256(l1, l2, 0x30);
+
+        _mm256_storeu_si256((__m256i *)(r + i),
+                            _mm256_or_si256(_mm256_or_si256(_mm256_shuffle_epi8(a, r0), _mm256_shuffle_epi8(m, r1)),
+                                            _mm256_shuffle_epi8(c, r2)));
+        _mm256_storeu_si256((__m256i *)(g + i),
+                            _mm256_or_si256(_mm256_or_si256(_mm256_shuffle_epi8(a, g0), _mm256_shuffle_epi8(m, g1)),
+                                            _mm256_shuffle_epi8(c, g2)));
+        _mm256_storeu_si256((__m256i *)(b + i),
+                            _mm256_or_si256(_mm256_or_si256(_mm256_shuffle_epi8(a, b0), _mm256_shuffle_epi8(m, b1)),
+                                            _mm256_shuffle_epi8(c, b2)));
+    }
+
+    return i;
+}
+
+__attribute__((target("avx2"))) static ptrdiff_t rgb_interleave_avx2(const uint8_t *r, const uint8_t *g,
+                                                                    const uint8_t *b, uint8_t *dst, ptrdiff_t n)
+{
+    /* Masks for output bytes 0-15, 16-31 and 32-47 of each lane, by channel */
+    const __m256i a_r = RGB_MASK(0, -1, -1, 1, -1, -1, 2, -1, -1, 3, -1, -1, 4, -1, -1, 5);
+    const __m256i a_g = RGB_MASK(-1, 0, -1, -1, 1, -1, -1, 2, -1, -1, 3, -1, -1, 4, -1, -1);
+    const __m256i a_b = RGB_MASK(-1, -1, 0, -1, -1, 1, -1, -1, 2, -1, -1, 3, -1, -1, 4, -1);
+    const __m256i m_r = RGB_MASK(-1, -1, 6, -1, -1, 7, -1, -1, 8, -1, -1, 9, -1, -1, 10, -1);
+    const __m256i m_g = RGB_MASK(5, -1, -1, 6, -1, -1, 7, -1, -1, 8, -1, -1, 9, -1, -1, 10);
+    const __m256i m_b = RGB_MASK(-1, 5, -1, -1, 6, -1, -1, 7, -1, -1, 8, -1, -1, 9, -1, -1);
+    const __m256i c_r = RGB_MASK(-1, 11, -1, -1, 12, -1, -1, 13, -1, -1, 14, -1, -1, 15, -1, -1);
+    const __m256i c_g = RGB_MASK(-1, -1, 11, -1, -1, 12, -1, -1, 13, -1, -1, 14, -1, -1, 15, -1);
+    const __m256i c_b = RGB_MASK(10, -1, -1, 11, -1, -1, 12, -1, -1, 13, -1, -1, 14, -1, -1, 15);
+    ptrdiff_t i;
+
+    for (i = 0; i + 32 <= n; i += 32) {
+        const __m256i vr = _mm256_loadu_si256((const __m256i *)(r + i));
+        const __m256i vg = _mm256_loadu_si256((const __m256i *)(g + i));
+        const __m256i vb = _mm256_loadu_si256((const __m256i *)(b + i));
+
+        const __m256i a = _mm256_or_si256(_mm256_or_si256(_mm256_shuffle_epi8(vr, a_r), _mm256_shuffle_epi8(vg, a_g)),
+                                          _mm256_shuffle_epi8(vb, a_b));
+        const __m256i m = _mm256_or_si256(_mm256_or_si256(_mm256_shuffle_epi8(vr, m_r), _mm256_shuffle_epi8(vg, m_g)),
+                                          _mm256_shuffle_epi8(vb, m_b));
+        const __m256i c = _mm256_or_si256(_mm256_or_si256(_mm256_shuffle_epi8(vr, c_r), _mm256_shuffle_epi8(vg, c_g)),
+                                          _mm256_shuffle_epi8(vb, c_b));
+
+        /* Undo the lane grouping of rgb_deinterleave_avx2 */
+        _mm256_storeu_si256((__m256i *)(dst + 3 * i), _mm256_permute2x128_si256(a, m, 0x20));
+        _mm256_storeu_si256((__m256i *)(dst + 3 * i + 32), _mm256_permute2x128_si256(c, a, 0x30));
+        _mm256_storeu_si256((__m256i *)(dst + 3 * i + 64), _mm256_permute2x128_si256(m, c, 0x31));
+    }
+
+    return i;
+}
+
+#undef RGB_MASK
+#endif /* RGB_HAVE_X86 */
+
+void rgb_init(void)
+{
+#ifdef RGB_HAVE_X86
+    __builtin_cpu_init();
+
+    if (__builtin_cpu_supports("avx2")) {
+        rgb_deinterleave_simd = rgb_deinterleave_avx2;
+        rgb_interleave_simd = rgb_interleave_avx2;
+    }
+#endif
+}
+
+void rgb_deinterleave_u8(const uint8_t *src, uint8_t *r, uint8_t *g, uint8_t *b, ptrdiff_t n)
+{
+    const rgb_deinterleave_fn simd = rgb_deinterleave_simd;
+    ptrdiff_t i = simd ? simd(src, r, g, b, n) : 0;
+
+    for (; i < n; i++) {
+        r[i] = src[3 * i];
+        g[i] = src[3 * i + 1];
+        b[i] = src[3 * i + 2];
+    }
+}
+
+void rgb_interleave_u8(const uint8_t *r, const uint8_t *g, const uint8_t *b, uint8_t *dst, ptrdiff_t n)
+{
+    const rgb_interleave_fn simd = rgb_interleave_simd;
+    ptrdiff_t i = simd ? simd(r, g, b, dst, n) : 0;
+
+    for (; i < n; i++) {
+        dst[3 * i] = r[i];
+        dst[3 * i + 1] = g[i];
+        dst[3 * i + 2] = b[i];
+    }
+}
@@ -0,0 +1,23 @@
+/*
+ * Conversion between interleaved RGB and planar uint8 image data.
+ */
+
+#ifndef SIMD_RGB_H
+#define SIMD_RGB_H
+
+#include <stddef.h>
+#include <stdint.h>
+
+/*
+ * Select the widest SIMD implementation supported by the running CPU. Call
+ * once before the conversions are used; until then they run the scalar loop.
+ */
+void rgb_init(void);
+
+/* Split n interleaved RGB pixels (3 * n bytes) into three planes of n bytes */
+void rgb_deinterleave_u8(const uint8_t *src, uint8_t *r, uint8_t *g, uint8_t *b, ptrdiff_t n);
+
+/* Merge three planes of n bytes into n interleaved RGB pixels (3 * n bytes) */
+void rgb_interleave_u8(const uint8_t *r, const uint8_t *g, const uint8_t *b, uint8_t *dst, ptrdiff_t n);
+
+#endif /* SIMD_RGB_H */
@@ -1,9 +1,18 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 import pytest
 
 import cython_image_processing
+from cython_image_processing import image_filters
 
 MAX_PIXEL_VALUE = 255
+# Largest deviation, in 8-bit levels, of the fixed-point separable blur from
+# an exact floating-point convolution
+MAX_BLUR_ERROR = 2
+# RGB sizes plus single-channel images only one to three pixels wide or tall,
+# where the 3x3 filters have little or no interior
+FILTER_SHAPES = [(50, 50, 3), (17, 33, 3), (9, 1, 1), (9, 2, 1), (9, 3, 1), (1, 7, 1), (2, 7, 1), (3, 7, 1)]
 
 
 def test_create_sample_image():
@@ -24,6 +33,29 @@ def test_create_sample_image_custom_size():
     assert image.dtype == np.uint8
 
 
+def test_create_sample_image_pattern():
+    """Test the gradient and diagonal patterns of the sample image."""
+    width, height = 37, 20
+    image = cython_image_processing.create_sample_image(width, height)
+
+    for y in (0, 7, height - 1):
+        for x in (0, 13, width - 1):
+            assert image[y, x, 0] == 255 * x // width
+            assert image[y, x, 1] == 255 * y // height
+            assert image[y, x, 2] == 255 * ((x + y) % width) // width
+
+
+def test_create_sample_image_returns_copies():
+    """Test that cached sample images are returned as independent copies."""
+    first = cython_image_processing.create_sample_image(40, 30)
+    first[:] = 0
+    second = cython_image_processing.create_sample_image(40, 30)
+
+    assert second.flags.writeable
+    assert not np.shares_memory(first, second)
+    assert np.any(second != 0)
+
+
 def test_process_image_blur():
     """Test blur filter operation."""
     image = cython_image_processing.create_sample_image(50, 50)
@@ -33,6 +65,116 @@ def test_process_image_blur():
     assert processed.dtype == image.dtype
 
 
+def _separable_reference(image, kernel):
+    """Exact floating-point separable convolution of the image interior."""
+    weights = kernel / kernel.sum()
+    radius = len(kernel) // 2
+    height, width = image.shape[:2]
+
+    rows = sum(w * image[:, i : i + width - 2 * radius].astype(np.float64) for i, w in enumerate(weights))
+    return sum(w * rows[i : i + height - 2 * radius] for i, w in enumerate(weights))
+
+
+def test_gaussian_blur_separable():
+    """Test the separable blur against a NumPy reference convolution."""
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (40, 53, 3), dtype=np.uint8)
+    kernel = np.array([1.0, 4.0, 6.0, 4.0, 1.0])
+    radius = len(kernel) // 2
+
+    blurred = image_filters.gaussian_blur_separable(image, kernel)
+
+    expected = _separable_reference(image, kernel)
+    interior = blurred[radius:-radius, radius:-radius].astype(np.float64)
+
+    assert blurred.shape == image.shape
+    assert np.abs(interior - expected).max() <= 1
+    assert np.array_equal(blurred[:radius], image[:radius])
+    assert np.array_equal(blurred[:, -radius:], image[:, -radius:])
+
+
+def test_gaussian_blur_separable_multiple_strips():
+    """Test an image tall and wide enough to be split into many cache-sized strips."""
+    rng = np.random.default_rng(2)
+    image = rng.integers(0, 256, (300, 1000, 3), dtype=np.uint8)
+    kernel = np.array([1.0, 4.0, 6.0, 4.0, 1.0])
+    radius = len(kernel) // 2
+
+    blurred = image_filters.gaussian_blur_separable(image, kernel)
+
+    interior = blurred[radius:-radius, radius:-radius].astype(np.float64)
+    assert np.abs(interior - _separable_reference(image, kernel)).max() <= 1
+    assert np.array_equal(blurred[-radius:], image[-radius:])
+
+
+def test_gaussian_blur_separable_wide_gaussian():
+    """Test the fixed-point error bound for Gaussian kernels up to sigma 10."""
+    rng = np.random.default_rng(1)
+    image = rng.integers(0, 256, (90, 100, 3), dtype=np.uint8)
+
+    for sigma in (3, 10):
+        offsets = np.arange(-3 * sigma, 3 * sigma + 1)
+        kernel = np.exp(-(offsets**2) / (2 * sigma**2))
+        radius = len(kernel) // 2
+
+        blurred = image_filters.gaussian_blur_separable(image, kernel)
+
+        interior = blurred[radius:-radius, radius:-radius].astype(np.float64)
+        assert np.abs(interior - _separable_reference(image, kernel)).max() <= MAX_BLUR_ERROR
+
+
+def test_gaussian_blur_separable_wide_flat_kernel():
+    """Test that wide flat kernels quantize to non-negative weights and stay accurate."""
+    for size in (101, 341, 385):
+        weights = image_filters._fixed_point_kernel(tuple(np.ones(size).tolist()))
+        assert weights.min() >= 0
+        assert weights.sum() == 1 << 8
+
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (120, 130, 3), dtype=np.uint8)
+    kernel = np.ones(101)
+    radius = len(kernel) // 2
+
+    blurred = image_filters.gaussian_blur_separable(image, kernel)
+
+    interior = blurred[radius:-radius, radius:-radius].astype(np.float64)
+    assert np.abs(interior - _separable_reference(image, kernel)).max() <= MAX_BLUR_ERROR
+
+
+def test_gaussian_blur_separable_invalid_kernel():
+    """Test that even-length, negative and non-finite kernels raise ValueError."""
+    image = cython_image_processing.create_sample_image(20, 20)
+
+    with pytest.raises(ValueError, match="odd length"):
+        image_filters.gaussian_blur_separable(image, np.ones(4))
+
+    for kernel in ([1.0, -1.0, 1.0], [0.0, 0.0, 0.0], [1.0, np.nan, 1.0], [1.0, np.inf, 1.0]):
+        with pytest.raises(ValueError, match="finite and non-negative"):
+            image_filters.gaussian_blur_separable(image, kernel)
+
+
+def test_simd_backends_match_scalar():
+    """Test that every SIMD backend available on this CPU matches the scalar loop."""
+    image = cython_image_processing.create_sample_image(157, 121)
+    # Sizes with a specialized kernel (3, 5) and without one (9, 101)
+    kernels = [np.array([1.0, 2.0, 1.0]), np.array([1.0, 4.0, 6.0, 4.0, 1.0]), np.ones(9), np.ones(101)]
+    default = image_filters.simd_backend()
+
+    try:
+        image_filters._set_simd_backend("scalar")
+        expected = [image_filters.gaussian_blur_separable(image, kernel) for kernel in kernels]
+
+        for name in ("sse2", "avx2", "avx512bw"):
+            try:
+                image_filters._set_simd_backend(name)
+            except ValueError:
+                continue
+            for kernel, reference in zip(kernels, expected):
+                np.testing.assert_array_equal(image_filters.gaussian_blur_separable(image, kernel), reference)
+    finally:
+        image_filters._set_simd_backend(default)
+
+
 def test_process_image_sharpen():
     """Test sharpen filter operation."""
     image = cython_image_processing.create_sample_image(50, 50)
@@ -51,6 +193,57 @@ def test_process_image_edge_detect():
     assert processed.dtype == image.dtype
 
 
+def _filter3x3_reference(image, kernel):
+    """Exact 3x3 correlation of the image interior, as int64."""
+    height, width = image.shape[:2]
+    pixels = image.astype(np.int64)
+
+    return sum(kernel[ky][kx] * pixels[ky : ky + height - 2, kx : kx + width - 2] for ky in range(3) for kx in range(3))
+
+
+def test_gaussian_blur_exact():
+    """Test the 3x3 Gaussian blur bit-for-bit against a NumPy reference."""
+    rng = np.random.default_rng(3)
+    kernel = [[1, 2, 1], [2, 4, 2], [1, 2, 1]]
+
+    for shape in FILTER_SHAPES:
+        image = rng.integers(0, 256, shape, dtype=np.uint8)
+        expected = image.copy()
+        expected[1:-1, 1:-1] = _filter3x3_reference(image, kernel) // 16
+
+        np.testing.assert_array_equal(image_filters.gaussian_blur(image), expected)
+
+
+def test_sharpen_filter_exact():
+    """Test the sharpening filter bit-for-bit against a NumPy reference."""
+    rng = np.random.default_rng(4)
+    kernel = [[0, -1, 0], [-1, 5, -1], [0, -1, 0]]
+
+    for shape in FILTER_SHAPES:
+        image = rng.integers(0, 256, shape, dtype=np.uint8)
+        expected = image.copy()
+        expected[1:-1, 1:-1] = np.clip(_filter3x3_reference(image, kernel), 0, MAX_PIXEL_VALUE)
+
+        np.testing.assert_array_equal(image_filters.sharpen_filter(image), expected)
+
+
+def test_edge_detection_exact():
+    """Test the Sobel edge detection bit-for-bit against a NumPy reference."""
+    rng = np.random.default_rng(5)
+    sobel_x = [[-1, 0, 1], [-2, 0, 2], [-1, 0, 1]]
+    sobel_y = [[-1, -2, -1], [0, 0, 0], [1, 2, 1]]
+
+    for shape in FILTER_SHAPES:
+        # Sparse bright pixels give magnitudes on both sides of the clamp
+        image = (rng.integers(0, 256, shape) * (rng.integers(0, 3, shape) == 0)).astype(np.uint8)
+        gx = _filter3x3_reference(image, sobel_x)
+        gy = _filter3x3_reference(image, sobel_y)
+        expected = np.zeros_like(image)
+        expected[1:-1, 1:-1] = np.minimum(np.sqrt(gx * gx + gy * gy), MAX_PIXEL_VALUE)
+
+        np.testing.assert_array_equal(image_filters.edge_detection(image), expected)
+
+
 def test_process_image_brightness():
     """Test brightness adjustment operation."""
     image = cython_image_processing.create_sample_image(50, 50)
@@ -60,6 +253,157 @@ def test_process_image_brightness():
     assert processed.dtype == image.dtype
 
 
+def test_adjust_brightness_values():
+    """Test brightness adjustment for every possible pixel value."""
+    values = np.arange(256, dtype=np.uint8)
+    image = np.stack([values, values[::-1], values], axis=-1).reshape(16, 16, 3)
+    processed = image_filters.adjust_brightness(image, 1.2)
+
+    expected = np.minimum(image * 1.2, MAX_PIXEL_VALUE).astype(np.uint8)
+    assert np.array_equal(processed, expected)
+
+
+def test_process_image_box_blur():
+    """Test box blur operation."""
+    image = cython_image_processing.create_sample_image(50, 50)
+    processed = cython_image_processing.process_image(image, "box_blur")
+
+    assert processed.shape == image.shape
+    assert processed.dtype == image.dtype
+
+
+def test_process_image_threads():
+    """Test that concurrent calls from several threads match serial results."""
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 256, (64, 48, 3), dtype=np.uint8) for _ in range(8)]
+    operations = ["blur", "sharpen", "edge_detect", "brightness", "box_blur"]
+    tasks = [(image, operation) for image in images for operation in operations]
+
+    expected = [cython_image_processing.process_image(image, operation) for image, operation in tasks]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda task: cython_image_processing.process_image(*task), tasks))
+
+    for result, reference in zip(results, expected):
+        assert np.array_equal(result, reference)
+
+
+def test_process_image_out():
+    """Test that every operation can write into a reused output buffer."""
+    image = cython_image_processing.create_sample_image(40, 30)
+    out = np.full_like(image, 77)
+
+    for operation in ["blur", "sharpen", "edge_detect", "brightness", "box_blur"]:
+        expected = cython_image_processing.process_image(image, operation)
+        result = cython_image_processing.process_image(image, operation, out=out)
+
+        assert result is out
+        assert np.array_equal(out, expected)
+
+    # Only brightness accepts the input image itself as out
+    expected = cython_image_processing.process_image(image, "brightness")
+    assert cython_image_processing.process_image(image, "brightness", out=image) is image
+    assert np.array_equal(image, expected)
+    with pytest.raises(ValueError, match="overlap"):
+        cython_image_processing.process_image(image, "blur", out=image)
+
+
+def test_out_validation():
+    """Test that unusable output arrays raise ValueError."""
+    image = cython_image_processing.create_sample_image(20, 20)
+
+    with pytest.raises(ValueError, match="shape"):
+        image_filters.sharpen_filter(image, out=np.empty((20, 21, 3), dtype=np.uint8))
+    with pytest.raises(ValueError, match="dtype"):
+        image_filters.sharpen_filter(image, out=np.empty((20, 20, 3), dtype=np.float32))
+    with pytest.raises(ValueError, match="overlap"):
+        image_filters.sharpen_filter(image, out=image)
+
+    # Brightness is a per-value map, so it can be applied in place
+    expected = image_filters.adjust_brightness(image, 0.5)
+    assert image_filters.adjust_brightness(image, 0.5, out=image) is image
+    assert np.array_equal(image, expected)
+
+
+def test_box_blur_single_pass():
+    """Test a single box blur pass against a NumPy reference with edge padding."""
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (30, 41, 3), dtype=np.uint8)
+    radius = 3
+    size = 2 * radius + 1
+    height, width = image.shape[:2]
+
+    blurred = image_filters.box_blur(image, radius, passes=1)
+
+    padded = np.pad(image.astype(np.int64), ((0, 0), (radius, radius), (0, 0)), mode="edge")
+    rows = (sum(padded[:, i : i + width] for i in range(size)) + size // 2) // size
+    padded = np.pad(rows, ((radius, radius), (0, 0), (0, 0)), mode="edge")
+    expected = (sum(padded[i : i + height] for i in range(size)) + size // 2) // size
+
+    assert np.array_equal(blurred, expected)
+
+
+def test_box_blur_uniform_image():
+    """Test that box blur leaves a uniform image unchanged."""
+    image = np.full((20, 25, 3), 77, dtype=np.uint8)
+
+    assert np.array_equal(image_filters.box_blur(image, 4), image)
+
+
+def test_image_stats():
+    """Test the fused min/max/mean reduction against NumPy."""
+    rng = np.random.default_rng(0)
+    image = rng.integers(10, 200, (23, 37, 3), dtype=np.uint8)
+    lo, hi, mean = cython_image_processing.image_stats(image)
+
+    assert (lo, hi) == (image.min(), image.max())
+    assert mean == pytest.approx(image.mean())
+
+    # Arrays with fewer than two axes are reduced as a single row
+    assert cython_image_processing.image_stats(np.array(42, dtype=np.uint8)) == (42, 42, 42.0)
+    values = np.array([7, 3, 250, 40], dtype=np.uint8)
+    assert cython_image_processing.image_stats(values) == (3, 250, 75.0)
+
+
+def test_planar_round_trip():
+    """Test conversion between interleaved and planar layouts."""
+    image = cython_image_processing.create_sample_image(31, 17)
+    planes = cython_image_processing.interleaved_to_planar(image)
+
+    assert planes.shape == (3, 17, 31)
+    assert planes.flags.c_contiguous
+    assert np.array_equal(planes[2], image[:, :, 2])
+    assert np.array_equal(cython_image_processing.planar_to_interleaved(planes), image)
+
+
+def test_rgb_shuffle_matches_numpy():
+    """Test the SIMD (de)interleave against NumPy, including partial vector blocks."""
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (9, 75, 3), dtype=np.uint8)
+    planes = image_filters.deinterleave_rgb(image)
+
+    assert np.array_equal(planes, np.ascontiguousarray(image.transpose(2, 0, 1)))
+    assert np.array_equal(image_filters.interleave_rgb(*planes), image)
+
+    with pytest.raises(ValueError, match="same shape"):
+        image_filters.interleave_rgb(planes[0], planes[1], planes[2, :, :-1])
+
+
+def test_blur_planes_match_interleaved():
+    """Test that filtering each plane matches filtering the interleaved image."""
+    rng = np.random.default_rng(1)
+    image = rng.integers(0, 256, (45, 70, 3), dtype=np.uint8)
+    planes = cython_image_processing.interleaved_to_planar(image)
+    kernel = np.array([1.0, 4.0, 6.0, 4.0, 1.0])
+
+    blurred = [image_filters.gaussian_blur_separable(plane, kernel) for plane in planes]
+    assert np.array_equal(
+        cython_image_processing.planar_to_interleaved(blurred), image_filters.gaussian_blur_separable(image, kernel)
+    )
+
+    boxed = [image_filters.box_blur(plane, 2) for plane in planes]
+    assert np.array_equal(cython_image_processing.planar_to_interleaved(boxed), image_filters.box_blur(image, 2))
+
+
 def test_process_image_invalid_operation():
     """Test that invalid operations raise ValueError."""
     image = cython_image_processing.create_sample_image(50, 50)